@@ -0,0 +1,198 @@
+"""
+DS1302 calendar helpers (2000 ~ 2099)
+
+DS1302 는 연도를 yy(00~99) 로만 저장하므로 20yy 범위 하나만 다루면 된다.
+이 범위의 달력을 import 시점에 작은 테이블로 미리 계산해 두고,
+검증 / 정규화 / 시간 증가를 모두 테이블 조회(O(1))로 처리한다.
+
+- day index : 2000-01-01 을 0 으로 하는 일 단위 인덱스 (0 ~ 36524)
+- dayofweek : DS1302 규격 (1: SUN, 2: MON ... 7: SAT)
+"""
+
+
+# =========================
+# Precomputed tables
+# =========================
+YEARS = 100
+DAYS_IN_CENTURY = 36525          # 2000~2099: 24 * 366 + 76 * 365
+_DOW_DAY0 = 6                    # 2000-01-01 = SAT (0: SUN 기준)
+
+# [leap][month] (month 1~12, index 0 unused)
+_MONTH_DAYS = (
+    bytes((0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)),
+    bytes((0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)),
+)
+
+def _build_month_offsets(mdays: bytes) -> tuple:
+    offsets = [0, 0]
+    for m in range(1, 12):
+        offsets.append(offsets[-1] + mdays[m])
+    return tuple(offsets)
+
+# [leap][month] -> 해당 월 1일의 day-of-year (0 기준)
+_MONTH_OFFSET = (
+    _build_month_offsets(_MONTH_DAYS[0]),
+    _build_month_offsets(_MONTH_DAYS[1]),
+)
+
+# [leap][day-of-year] -> month
+_DOY_TO_MONTH = tuple(
+    bytes(m for m in range(1, 13) for _ in range(_MONTH_DAYS[leap][m]))
+    for leap in (0, 1)
+)
+
+# [yy] -> leap flag. 2000 은 400 의 배수라 20yy 범위에서는 yy % 4 == 0 이 정확하다.
+_YEAR_LEAP = bytes(1 if yy % 4 == 0 else 0 for yy in range(YEARS))
+
+# [yy] -> 1월 1일의 day index
+_YEAR_START = tuple(365 * yy + (yy + 3) // 4 for yy in range(YEARS))
+
+# [yy * 12 + (month - 1)] -> 해당 월 1일의 요일 (1: SUN ... 7: SAT)
+_MONTH_FIRST_DOW = bytes(
+    (_DOW_DAY0 + _YEAR_START[yy] + _MONTH_OFFSET[_YEAR_LEAP[yy]][m]) % 7 + 1
+    for yy in range(YEARS) for m in range(1, 13)
+)
+
+
+# =========================
+# Lookups
+# =========================
+def is_leap(year_yy: int) -> bool:
+    return _YEAR_LEAP[year_yy % YEARS] == 1
+
+def days_in_month(year_yy: int, month: int) -> int:
+    return _MONTH_DAYS[_YEAR_LEAP[year_yy % YEARS]][month]
+
+def day_of_week(year_yy: int, month: int, date: int) -> int:
+    """DS1302 요일 (1: SUN, 2: MON ... 7: SAT)"""
+    return (_MONTH_FIRST_DOW[(year_yy % YEARS) * 12 + month - 1] + date - 2) % 7 + 1
+
+def day_index(year_yy: int, month: int, date: int) -> int:
+    """2000-01-01 기준 일 인덱스"""
+    yy = year_yy % YEARS
+    return _YEAR_START[yy] + _MONTH_OFFSET[_YEAR_LEAP[yy]][month] + date - 1
+
+def from_day_index(idx: int):
+    """day index -> (yy, month, date). 범위를 넘으면 100년 단위로 순환."""
+    idx %= DAYS_IN_CENTURY
+    yy = (idx * 4) // 1461
+    if idx < _YEAR_START[yy]:
+        yy -= 1
+    elif yy + 1 < YEARS and idx >= _YEAR_START[yy + 1]:
+        yy += 1
+    leap = _YEAR_LEAP[yy]
+    doy = idx - _YEAR_START[yy]
+    month = _DOY_TO_MONTH[leap][doy]
+    return yy, month, doy - _MONTH_OFFSET[leap][month] + 1
+
+
+# =========================
+# DS1302DateTime operations
+# =========================
+def is_valid(t) -> bool:
+    return (
+        0 <= t.year < YEARS
+        and 1 <= t.month <= 12
+        and 1 <= t.date <= days_in_month(t.year, t.month)
+        and 0 <= t.hours <= 23
+        and 0 <= t.minutes <= 59
+        and 0 <= t.seconds <= 59
+    )
+
+def normalize(t):
+    """
+    SETTING 편집 후 호출.
+    year 는 00~99 순환, 나머지 필드는 범위 안으로 clamp,
+    date 는 해당 월 길이에 맞추고 dayofweek 를 다시 계산한다.
+    """
+    t.year %= YEARS
+    t.month = 1 if t.month < 1 else 12 if t.month > 12 else t.month
+    mdays = _MONTH_DAYS[_YEAR_LEAP[t.year]][t.month]
+    t.date = 1 if t.date < 1 else mdays if t.date > mdays else t.date
+    t.hours = 0 if t.hours < 0 else 23 if t.hours > 23 else t.hours
+    t.minutes = 0 if t.minutes < 0 else 59 if t.minutes > 59 else t.minutes
+    t.seconds = 0 if t.seconds < 0 else 59 if t.seconds > 59 else t.seconds
+    t.dayofweek = day_of_week(t.year, t.month, t.date)
+    return t
+
+def advance_seconds(t, n: int = 1):
+    """
+    t 를 n 초 만큼 진행 (음수 가능). 디바이스 없이 로컬로 시간을 흘릴 때 사용.
+    t 는 유효한 값이라고 가정한다.
+    """
+    total = t.seconds + t.minutes * 60 + t.hours * 3600 + n
+    days, rem = divmod(total, 86400)
+    t.hours, rem = divmod(rem, 3600)
+    t.minutes, t.seconds = divmod(rem, 60)
+
+    if days:
+        if days == 1 and t.date < days_in_month(t.year, t.month):
+            # 가장 흔한 경우: 같은 달 안에서 하루 증가
+            t.date += 1
+        else:
+            t.year, t.month, t.date = from_day_index(
+                day_index(t.year, t.month, t.date) + days)
+    t.dayofweek = day_of_week(t.year, t.month, t.date)
+    return t
+
+
+# =========================
+# Benchmark
+# + python3 ds1302_calendar.py
+# =========================
+if __name__ == "__main__":
+    import calendar
+    import datetime
+    import timeit
+    from types import SimpleNamespace
+
+    def normalize_datetime(t):
+        # 비교용: datetime / calendar 기반 정규화
+        t.year %= YEARS
+        t.month = max(1, min(12, t.month))
+        t.date = max(1, min(calendar.monthrange(2000 + t.year, t.month)[1], t.date))
+        t.hours = max(0, min(23, t.hours))
+        t.minutes = max(0, min(59, t.minutes))
+        t.seconds = max(0, min(59, t.seconds))
+        t.dayofweek = datetime.date(2000 + t.year, t.month, t.date).isoweekday() % 7 + 1
+        return t
+
+    def advance_datetime(t, n=1):
+        d = datetime.datetime(2000 + t.year, t.month, t.date,
+                              t.hours, t.minutes, t.seconds) + datetime.timedelta(seconds=n)
+        t.year, t.month, t.date = d.year % 100, d.month, d.day
+        t.hours, t.minutes, t.seconds = d.hour, d.minute, d.second
+        t.dayofweek = d.isoweekday() % 7 + 1
+        return t
+
+    # 전 범위 교차 검증
+    d = datetime.date(2000, 1, 1)
+    for idx in range(DAYS_IN_CENTURY):
+        assert from_day_index(idx) == (d.year - 2000, d.month, d.day)
+        assert day_index(d.year - 2000, d.month, d.day) == idx
+        assert day_of_week(d.year - 2000, d.month, d.day) == d.isoweekday() % 7 + 1
+        d += datetime.timedelta(days=1)
+
+    for step, count in ((7, 100000), (3599, 20000), (86399, 15000), (86400 * 40 + 1, 300), (-86400 * 3 - 5, 5000)):
+        a = SimpleNamespace(year=50, month=12, date=31, hours=23, minutes=59, seconds=0, dayofweek=0)
+        b = SimpleNamespace(**vars(a))
+        for _ in range(count):
+            advance_seconds(a, step)
+            advance_datetime(b, step)
+            assert vars(a) == vars(b)
+
+    # 2099-12-31 23:59:59 + 1s -> 2000-01-01 (yy 순환)
+    w = SimpleNamespace(year=99, month=12, date=31, hours=23, minutes=59, seconds=59, dayofweek=0)
+    advance_seconds(w)
+    assert (w.year, w.month, w.date, w.hours, w.dayofweek) == (0, 1, 1, 0, 7)
+
+    n = 200000
+    t = SimpleNamespace(year=25, month=2, date=31, hours=10, minutes=20, seconds=30, dayofweek=0)
+    for name, fn in (
+        ("normalize (table)", lambda: normalize(t)),
+        ("normalize (datetime)", lambda: normalize_datetime(t)),
+        ("advance_seconds (table)", lambda: advance_seconds(t)),
+        ("advance_seconds (datetime)", lambda: advance_datetime(t)),
+    ):
+        sec = timeit.timeit(fn, number=n)
+        print(f"  {name:28s}: {sec / n * 1e9:8.1f} ns/call")
@@ -0,0 +1,276 @@
+"""
+Device connection manager
+
+open_with_retry() 처럼 열릴 때까지 블로킹하지 않고, 메인 루프가 돌 때마다
+service() 를 호출하면 재시도 시각이 된 경우에만 한 번 open 을 시도한다.
+(exponential backoff + jitter)
+
+- POLLERR / POLLHUP, read 에러, 디바이스 노드 삭제/재생성(rmmod/insmod) 시
+  drop() 으로 fd 를 poll 에서 빼고 닫은 뒤 재연결 대기 상태로 전환
+- backoff 는 연결 후 처음으로 정상 read 가 된 뒤에만 초기화
+  (open 직후 바로 끊기는 노드도 drop/open 을 반복하며 delay 가 계속 증가)
+- 재연결 횟수 / 끊김 시간 통계 제공 (재연결은 끊긴 뒤 첫 정상 read 기준)
+"""
+
+import os
+import sys
+import math
+import time
+import random
+import select
+
+
+DEBUG = 1
+
+POLL_MASK = select.POLLIN | select.POLLERR | select.POLLHUP
+
+# 2 ** n 이 float 범위를 넘지 않도록 (max_delay 에는 훨씬 전에 도달)
+MAX_BACKOFF_EXP = 16
+
+
+class DeviceConnection:
+    def __init__(self, path: str, poller, base_delay: float = 0.25,
+                 max_delay: float = 8.0, jitter: float = 0.2, clock=time.monotonic):
+        self.path = path
+        self.poller = poller
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.clock = clock
+
+        self.fd = -1
+        self._ident = None          # (st_dev, st_ino, st_rdev) at open
+        self._attempt = 0
+        self._next_try = clock()
+        self._healthy = False       # 현재 연결에서 정상 read 가 있었는지
+
+        # stats
+        self.reconnect_count = 0    # 끊긴 뒤 다시 연결되어 정상 read 된 횟수
+        self.drop_count = 0         # 정상 read 되던 연결이 끊긴 횟수
+        self.outage_start = self._next_try
+        self.last_outage_sec = 0.0
+        self.total_outage_sec = 0.0
+        self.max_outage_sec = 0.0
+
+    @property
+    def connected(self) -> bool:
+        return self.fd >= 0
+
+    def outage_sec(self) -> float:
+        """현재 끊겨 있는 시간 (연결 상태면 0)"""
+        return 0.0 if self.connected else self.clock() - self.outage_start
+
+    def ms_until_retry(self) -> int:
+        if self.connected:
+            return -1
+        # 올림: 0 을 반환하면 재시도 시각이 이미 지났음을 보장 (poll(0) busy loop 방지)
+        return max(0, math.ceil((self._next_try - self.clock()) * 1000))
+
+    def service(self) -> bool:
+        """재시도 시각이 되었으면 한 번만 open 시도. 연결 상태를 반환."""
+        if self.connected:
+            return True
+        now = self.clock()
+        if now < self._next_try:
+            return False
+
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_NONBLOCK)
+            st = os.fstat(fd)
+        except OSError as e:
+            delay = self._schedule_retry(now)
+            if DEBUG:
+                print(f"  [error] open : {self.path} ({e.strerror}), retry in {delay:.2f}s", file=sys.stderr)
+            return False
+
+        self.fd = fd
+        self._ident = (st.st_dev, st.st_ino, st.st_rdev)
+        self._healthy = False
+        self.poller.register(fd, POLL_MASK)
+        if DEBUG:
+            print(f"  [open] {self.path} fd={fd} (attempt: {self._attempt}, outage: {now - self.outage_start:.2f}s)")
+        return True
+
+    def _schedule_retry(self, now: float) -> float:
+        self._attempt += 1
+        delay = self.base_delay * (2 ** min(self._attempt - 1, MAX_BACKOFF_EXP))
+        delay *= 1.0 + random.uniform(-self.jitter, self.jitter)
+        delay = min(self.max_delay, delay)
+        self._next_try = now + delay
+        return delay
+
+    def _mark_healthy(self) -> None:
+        """연결 후 첫 정상 read: backoff 초기화, 끊겼다 돌아온 경우 통계 반영"""
+        self._healthy = True
+        self._attempt = 0
+        if self.drop_count > 0:
+            outage = self.clock() - self.outage_start
+            self.reconnect_count += 1
+            self.last_outage_sec = outage
+            self.total_outage_sec += outage
+            self.max_outage_sec = max(self.max_outage_sec, outage)
+
+    def drop(self, reason: str = "") -> None:
+        """stale fd 를 poll 에서 제거하고 닫은 뒤 재연결 대기"""
+        if not self.connected:
+            return
+        if DEBUG:
+            print(f"  [drop] {self.path} fd={self.fd} {reason}", file=sys.stderr)
+        try:
+            self.poller.unregister(self.fd)
+        except (KeyError, ValueError, OSError):
+            pass
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+        self.fd = -1
+        self._ident = None
+        now = self.clock()
+        # 정상 read 없이 끊긴 경우는 이전 끊김이 이어지는 것으로 보고 backoff 유지
+        if self._healthy:
+            self.drop_count += 1
+            self.outage_start = now
+        self._healthy = False
+        self._schedule_retry(now)
+
+    def is_stale(self) -> bool:
+        """디바이스 노드가 삭제되었거나 다른 노드로 바뀌었는지 (rmmod/insmod)"""
+        if not self.connected:
+            return False
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return True
+        return (st.st_dev, st.st_ino, st.st_rdev) != self._ident
+
+    def read_into(self, buf: bytearray) -> int:
+        """
+        non-blocking read. 미리 할당한 buf 에 읽고 길이를 반환 (데이터가 없으면 0).
+        EAGAIN 이외의 에러는 drop() 처리.
+        """
+        if not self.connected:
+            return 0
+        try:
+            n = os.readv(self.fd, (buf,))
+        except BlockingIOError:
+            return 0
+        except OSError as e:
+            self.drop(f"read error: {e}")
+            return 0
+        if n and not self._healthy:
+            self._mark_healthy()
+        return n
+
+    def close(self) -> None:
+        if self.connected:
+            try:
+                self.poller.unregister(self.fd)
+            except (KeyError, ValueError, OSError):
+                pass
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = -1
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "reconnect_count": self.reconnect_count,
+            "drop_count": self.drop_count,
+            "outage_sec": self.outage_sec(),
+            "last_outage_sec": self.last_outage_sec,
+            "total_outage_sec": self.total_outage_sec,
+            "max_outage_sec": self.max_outage_sec,
+        }
+
+
+# =========================
+# Self test
+# + FIFO 를 디바이스 노드 대신 사용: 삭제 -> 재생성으로 rmmod/insmod 흉내
+# + python3 ds1302_device.py
+# =========================
+if __name__ == "__main__":
+    import tempfile
+
+    DEBUG = 0
+    path = os.path.join(tempfile.mkdtemp(), "my_custom_device_driver")
+    p = select.poll()
+    conn = DeviceConnection(path, p, base_delay=0.02, max_delay=0.1)
+
+    # 노드 없음: 블로킹 없이 실패
+    t0 = time.monotonic()
+    assert not conn.service()
+    assert time.monotonic() - t0 < 0.05
+    assert 0 <= conn.ms_until_retry() <= 100
+
+    os.mkfifo(path)
+    while not conn.service():
+        time.sleep(0.005)
+    assert conn.connected and conn.reconnect_count == 0
+
+    # driver 처럼 한 줄 쓰고 poll 로 읽기
+    w = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+    os.write(w, b"25122910203010\n")
+    events = p.poll(100)
+    assert events and events[0][0] == conn.fd
+    buf = bytearray(256)
+    n = conn.read_into(buf)
+    assert buf[:n] == b"25122910203010\n"
+    os.close(w)
+
+    # rmmod: 노드 삭제 -> stale 감지 -> poll 에서 제거
+    os.unlink(path)
+    assert conn.is_stale()
+    old_fd = conn.fd
+    conn.drop("node removed")
+    assert not conn.connected and conn.drop_count == 1
+    assert p.poll(0) == []
+    try:
+        os.fstat(old_fd)
+        raise AssertionError("stale fd still open")
+    except OSError:
+        pass
+
+    # 끊긴 동안 backoff 증가 확인
+    delays = []
+    while len(delays) < 4:
+        if conn.ms_until_retry() == 0:
+            assert not conn.service()
+            delays.append(conn.ms_until_retry())
+        time.sleep(0.005)
+    assert delays[-1] >= delays[0]
+    assert conn.outage_sec() > 0
+
+    # insmod: 노드 재생성 -> 재연결 (첫 정상 read 에서 재연결로 집계)
+    os.mkfifo(path)
+    deadline = time.monotonic() + 1.0
+    while not conn.service():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    assert not conn.is_stale() and conn.reconnect_count == 0
+    w = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+    os.write(w, b"25122910203010\n")
+    assert conn.read_into(buf) == 15
+    os.close(w)
+    s = conn.stats()
+    assert s["reconnect_count"] == 1 and s["last_outage_sec"] > 0
+
+    # 반쯤 올라온 드라이버: open 직후 read 없이 끊기면 backoff 가 초기화되지 않고 계속 증가
+    flaps = []
+    while len(flaps) < 4:
+        conn.drop("poll error/hup")
+        flaps.append(conn.ms_until_retry())
+        deadline = time.monotonic() + 1.0
+        while not conn.service():
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+    assert flaps[0] <= 25 and flaps[-1] > 2 * flaps[0] and flaps[-1] <= 100
+    s = conn.stats()
+    assert s["drop_count"] == 2 and s["reconnect_count"] == 1
+    print(f"  ok: {s}")
+
+    conn.close()
+    os.unlink(path)
+    os.rmdir(os.path.dirname(path))
@@ -0,0 +1,137 @@
+"""
+Boot snapshot
+
+종료 시 / 주기적으로 마지막 상태를 작은 바이너리 파일로 저장하고,
+부팅 직후 디바이스 open 전에 읽어서 마지막 화면을 바로 띄운다.
+
+layout (little endian):
+    magic(4) version(1)
+    seconds minutes hours date month dayofweek year ampm hourmode (9 x u8)
+    clock_delta_pos(i8) state(u8) saved_at(f64)
+    frame_len(u16) frame(packed 1bpp, 128x64 -> 1024 bytes)
+"""
+
+import os
+import struct
+import time
+
+
+SNAPSHOT_MAGIC = b"OLED"
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct("<4sB9BbBdH")
+
+TIME_FIELDS = ("seconds", "minutes", "hours", "date", "month",
+               "dayofweek", "year", "ampm", "hourmode")
+
+
+class FrameCapture:
+    """
+    luma device proxy.
+    canvas(FrameCapture(device)) 로 그리면 마지막으로 display 된 이미지를 보관한다.
+    """
+    def __init__(self, device):
+        self._device = device
+        self.image = None
+
+    def __getattr__(self, name):
+        return getattr(self._device, name)
+
+    def display(self, image) -> None:
+        self.image = image
+        self._device.display(image)
+
+    def frame_bytes(self) -> bytes:
+        if self.image is None:
+            return b""
+        return self.image.convert("1").tobytes()
+
+
+def save(path: str, t, clock_delta_pos: int, state: int, frame: bytes = b"") -> bool:
+    """tmp 파일에 쓰고 rename (중간에 전원이 꺼져도 이전 snapshot 유지)"""
+    data = _HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+        *(getattr(t, name) & 0xff for name in TIME_FIELDS),
+        clock_delta_pos, state, time.time(), len(frame),
+    ) + frame
+
+    tmp = path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # 한 번에 쓰므로 unbuffered (buffered writer 는 저장마다 수십 KiB 버퍼를 할당)
+        with open(tmp, "wb", buffering=0) as f:
+            if f.write(data) != len(data):
+                return False
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except OSError:
+        return False
+    return True
+
+
+def load(path: str):
+    """
+    반환: dict(time=..., clock_delta_pos=..., state=..., saved_at=..., frame=...)
+    파일이 없거나 깨졌으면 None
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if len(data) < _HEADER.size:
+        return None
+    fields = _HEADER.unpack_from(data)
+    if fields[0] != SNAPSHOT_MAGIC or fields[1] != SNAPSHOT_VERSION:
+        return None
+
+    frame_len = fields[-1]
+    frame = data[_HEADER.size:_HEADER.size + frame_len]
+    if len(frame) != frame_len:
+        return None
+
+    return {
+        "time": dict(zip(TIME_FIELDS, fields[2:11])),
+        "clock_delta_pos": fields[11],
+        "state": fields[12],
+        "saved_at": fields[13],
+        "frame": frame,
+    }
+
+
+# =========================
+# Self test
+# + python3 ds1302_snapshot.py
+# =========================
+if __name__ == "__main__":
+    import tempfile
+    from types import SimpleNamespace
+
+    path = os.path.join(tempfile.mkdtemp(), "state", "oled_snapshot.bin")
+    assert load(path) is None
+
+    t = SimpleNamespace(seconds=30, minutes=20, hours=10, date=29, month=12,
+                        dayofweek=2, year=25, ampm=0, hourmode=0)
+    frame = bytes(range(256)) * 4
+    assert save(path, t, -12, 1, frame)
+
+    snap = load(path)
+    assert snap["time"] == vars(t)
+    assert snap["clock_delta_pos"] == -12 and snap["state"] == 1
+    assert snap["frame"] == frame
+
+    # 깨진 파일은 무시
+    with open(path, "r+b") as f:
+        f.truncate(_HEADER.size + 10)
+    assert load(path) is None
+
+    n = 200
+    t0 = time.perf_counter()
+    for _ in range(n):
+        load(path)
+    print(f"  ok: load {(time.perf_counter() - t0) / n * 1e6:.1f} us, size {_HEADER.size + len(frame)} bytes")
+
+    os.unlink(path)
+    os.rmdir(os.path.dirname(path))
+    os.rmdir(os.path.dirname(os.path.dirname(path)))
@@ -0,0 +1,165 @@
+"""
+Memory budget sampler
+
+메인 루프 한 바퀴(frame)마다 sample(state) 를 호출하면
+- tracemalloc 으로 frame 동안 할당된 메모리(high-water)와 순증가량
+- 주기적으로 /proc/self/statm 의 RSS
+를 UIState 별로 집계하고, 설정한 budget 을 넘으면 경고하거나 MemoryBudgetError 를 낸다.
+
+tracemalloc 은 느리므로 memory budget 모드에서만 켠다.
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+
+PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024 if hasattr(os, "sysconf") else 4
+
+
+class MemoryBudgetError(RuntimeError):
+    pass
+
+
+def read_rss_kb() -> int:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * PAGE_KB
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class StateStats:
+    __slots__ = ("frames", "alloc_sum", "alloc_max", "net_sum", "rss_peak_kb")
+
+    def __init__(self):
+        self.frames = 0
+        self.alloc_sum = 0      # bytes
+        self.alloc_max = 0      # bytes
+        self.net_sum = 0        # bytes
+        self.rss_peak_kb = 0
+
+
+class MemorySampler:
+    """
+    frame_budget_kb : frame 당 할당 high-water 한도 (0: 검사 안 함)
+    rss_budget_kb   : RSS 한도 (0: 검사 안 함)
+    action          : "warn" (stderr 에 상태/종류별 1회 출력) 또는 "fail" (MemoryBudgetError)
+    """
+    def __init__(self, frame_budget_kb: int = 0, rss_budget_kb: int = 0, action: str = "warn",
+                 rss_interval: float = 1.0, clock=time.monotonic):
+        if action not in ("warn", "fail"):
+            raise ValueError(f"action: {action}")
+        self.frame_budget = frame_budget_kb * 1024
+        self.rss_budget_kb = rss_budget_kb
+        self.action = action
+        self.rss_interval = rss_interval
+        self.clock = clock
+
+        self.stats = {}
+        self.rss_kb = 0
+        self.rss_peak_kb = 0
+        self._state = None
+        self._start = 0
+        self._next_rss = 0.0
+        self._warned = set()
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def sample(self, state: str) -> None:
+        """이전 sample 이후를 한 frame 으로 집계하고 새 frame 시작"""
+        # 측정 시점에 sampler 자신의 지역 변수가 남지 않도록 단계별 method 로 분리
+        if self._state is not None:
+            self._end_frame()
+        self._sample_rss(state)
+        self._state = state
+        self._begin_frame()
+
+    def _begin_frame(self) -> None:
+        tracemalloc.reset_peak()
+        self._start = tracemalloc.get_traced_memory()[0]
+
+    def _end_frame(self) -> None:
+        cur, peak = tracemalloc.get_traced_memory()
+        st = self.stats.get(self._state)
+        if st is None:
+            st = self.stats[self._state] = StateStats()
+        alloc = peak - self._start
+        st.frames += 1
+        st.alloc_sum += alloc
+        st.net_sum += cur - self._start
+        if alloc > st.alloc_max:
+            st.alloc_max = alloc
+        if self.frame_budget and alloc > self.frame_budget:
+            self._exceeded("frame", self._state,
+                           f"{alloc / 1024:.1f} KiB allocated in one frame (budget {self.frame_budget // 1024} KiB)")
+
+    def _sample_rss(self, state: str) -> None:
+        now = self.clock()
+        if now < self._next_rss:
+            return
+        self._next_rss = now + self.rss_interval
+        self.rss_kb = read_rss_kb()
+        if self.rss_kb > self.rss_peak_kb:
+            self.rss_peak_kb = self.rss_kb
+        st = self.stats.get(state)
+        if st is None:
+            st = self.stats[state] = StateStats()
+        if self.rss_kb > st.rss_peak_kb:
+            st.rss_peak_kb = self.rss_kb
+        if self.rss_budget_kb and self.rss_kb > self.rss_budget_kb:
+            self._exceeded("rss", state, f"RSS {self.rss_kb} KiB (budget {self.rss_budget_kb} KiB)")
+
+    def _exceeded(self, kind: str, state: str, msg: str) -> None:
+        if self.action == "fail":
+            raise MemoryBudgetError(f"[{state}] {msg}")
+        if (kind, state) not in self._warned:
+            self._warned.add((kind, state))
+            print(f"  [memory] warning [{state}] {msg}", file=sys.stderr)
+
+    def traced_kb(self) -> float:
+        return tracemalloc.get_traced_memory()[0] / 1024
+
+    def report(self) -> str:
+        lines = [f"  {'state':12s} {'frames':>9s} {'alloc avg':>10s} {'alloc max':>10s} {'net avg':>9s} {'rss peak':>10s}"]
+        for state, st in self.stats.items():
+            n = st.frames or 1
+            lines.append(
+                f"  {state:12s} {st.frames:9d} {st.alloc_sum / n:9.0f}B {st.alloc_max:9d}B "
+                f"{st.net_sum / n:8.1f}B {st.rss_peak_kb:7d}KiB")
+        lines.append(f"  traced: {self.traced_kb():.1f} KiB, rss: {self.rss_kb} KiB (peak {self.rss_peak_kb} KiB)")
+        return "\n".join(lines)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+
+
+# =========================
+# Self test
+# + python3 memory_budget.py
+# =========================
+if __name__ == "__main__":
+    sampler = MemorySampler(frame_budget_kb=64, rss_budget_kb=0, action="fail")
+
+    # 할당 후 바로 해제: 순증가 없음
+    for _ in range(1000):
+        sampler.sample("ACTIVE")
+        buf = bytes(4096)
+        del buf
+    sampler.sample("ACTIVE")
+    st = sampler.stats["ACTIVE"]
+    assert st.frames == 1000 and st.alloc_max >= 4096 and abs(st.net_sum / st.frames) < 64
+
+    # frame budget 초과
+    try:
+        sampler.sample("SETTING")
+        big = bytearray(128 * 1024)
+        sampler.sample("SETTING")
+        raise AssertionError("budget not enforced")
+    except MemoryBudgetError as e:
+        print(f"  ok: {e}")
+
+    print(sampler.report())
+    sampler.stop()
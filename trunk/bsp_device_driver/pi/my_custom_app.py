@@ -1,7 +1,10 @@
+import time
+# 첫 화면 시간은 module import 를 포함해 프로세스 시작(이 파일의 첫 줄) 기준으로 측정
+PROCESS_START_TS = time.monotonic()
+
 from luma.core.interface.serial import spi, i2c
 from luma.oled.device import ssd1306
-from luma.core.render import canvas
-from PIL import ImageFont
+from PIL import Image, ImageDraw, ImageFont
 
 import RPi.GPIO as GPIO
 
@@ -9,27 +12,52 @@ import os
 import sys
 import errno
 import select
-import time
+import signal
 import math
 from dataclasses import dataclass
 from enum import Enum, auto
 
+from ds1302_calendar import day_of_week, is_valid, normalize, advance_seconds
+import ds1302_snapshot
+from ds1302_snapshot import FrameCapture
+# ds1302_device 는 첫 화면 출력 후, oled_sweep / memory_budget 은 해당 모드일 때만 main() 에서 import
+
 
 # =========================
 # Configuration
 # =========================
-DEBUG = 1
+DEBUG = 1   # 0: 끔, 1: 연결/상태 변경 로그, 2: + 디바이스 read 마다 내용 출력 (이벤트마다 문자열 할당)
 
 DEVICE_NAME = "/dev/my_custom_device_driver"
 
 IDLE_TO_SCREENSAVER_SEC = 10.0
 
+# poll timeout 시 디바이스를 읽는 주기 (드라이버 DS1302_TIMER_MS 와 동일)
+DEVICE_POLL_MS = 870
+
+# 소스 트리 밖에 저장 (환경 변수로 변경 가능, 디렉터리는 없으면 생성)
+SNAPSHOT_PATH = os.environ.get("MY_CUSTOM_APP_SNAPSHOT", "/var/lib/my_custom_app/oled_snapshot.bin")
+# 루프 중 snapshot 은 UI 상태/시계 위치가 바뀌었을 때만 저장 (SD 카드 fsync 최소화).
+# 시간은 부팅 시 경과 시간으로 보정되고 RTC 로 덮어쓰므로 변경 조건에 넣지 않음.
+SNAPSHOT_CHECK_SEC = 60.0
+SNAPSHOT_MAX_AGE_SEC = 6 * 3600.0   # 변경이 없어도 이 주기로는 한 번 저장 (마지막 화면 갱신)
+
+# ACTIVE 화면 초침/분침을 부드럽게 움직임 (0: 1초 단위, 1: sweep)
+SWEEP_MODE = 0
+SWEEP_FPS = 30          # 20 ~ 60
+
+# 장기 실행 메모리 점검 (tracemalloc + RSS 샘플링, 느려지므로 진단용)
+MEMORY_BUDGET_MODE = 0
+MEMORY_BUDGET_FRAME_KB = 96     # frame 당 할당 high-water 한도 (0: 검사 안 함). snapshot 저장 frame 의 PIL tobytes 버퍼(64 KiB) 포함
+MEMORY_BUDGET_RSS_KB = 0        # RSS 한도 (0: 검사 안 함)
+MEMORY_BUDGET_ACTION = "warn"   # "warn" / "fail"
+
 
 # =========================
 # Time Data
 # + DS1302 Date Time Structure
 # =========================
-@dataclass
+@dataclass(slots=True)
 class DS1302DateTime:
     seconds: int = 30
     minutes: int = 20
@@ -40,21 +68,22 @@ class DS1302DateTime:
     year: int = 25
     ampm: int = 0        # 1: PM, 2: AM
     hourmode: int = 0    # 0: 24hr, 1: 12hr
-    
-def days_in_month(year_yy: int, month: int) -> int:
-    # yy(00~99) 기준. 윤년 간단 처리(2000~2099라고 가정하면 yy%4==0 윤년이 대체로 맞음)
-    # 정확히 하려면 기준 연도(20yy)를 잡아야 하는데, UI 용도로는 충분.
-    if month in (1, 3, 5, 7, 8, 10, 12):
-        return 31
-    if month in (4, 6, 9, 11):
-        return 30
-    # February
-    leap = (year_yy % 4 == 0)
-    return 29 if leap else 28
+
+@dataclass(slots=True)
+class TimeInput:
+    # 드라이버 read 한 줄 (YYMMDDhhmmssRK). 루프에서 하나를 계속 재사용
+    year: int = 0
+    month: int = 0
+    date: int = 0
+    hours: int = 0
+    minutes: int = 0
+    seconds: int = 0
+    rotary: int = 0
+    key: int = 0
     
 def time_to_str(t: DS1302DateTime) -> str:
-    """C의 snprintf("%02d%02d%02d%02d%02d%02d\\n", ...) 대응"""
-    return f"{t.year:02d}{t.month:02d}{t.date:02d}{t.hours:02d}{t.minutes:02d}{t.seconds:02d}\n"
+    """C의 snprintf("%02d%02d%02d%02d%02d%02d%01d\\n", ...) 대응 (마지막 1자리: dayofweek)"""
+    return f"{t.year:02d}{t.month:02d}{t.date:02d}{t.hours:02d}{t.minutes:02d}{t.seconds:02d}{t.dayofweek:01d}\n"
 
 def clamp(v: int, lo: int, hi: int) -> int:
     return max(lo, min(hi, v))
@@ -63,19 +92,9 @@ def clamp(v: int, lo: int, hi: int) -> int:
 # =========================
 # Device Driver
 # =========================
-def open_with_retry(path: str) -> int:
-    """C의 while(open<0){sleep(2)} 와 동일"""
-    fd = -1
-    while fd < 0:
-        try:
-            fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
-        except:
-            print(f"  [error] open : {path}", file=sys.stderr)
-            time.sleep(2)
-    return fd
-
 def write_time(fd: int, t: DS1302DateTime) -> int:
     """write time"""
+    t.dayofweek = day_of_week(t.year, t.month, t.date)
     msg = time_to_str(t)
     if DEBUG:
         print(f"  [write] msg: {msg}", end="")
@@ -121,23 +140,31 @@ def read_time_ipnut(fd: int) -> str:
     # 여러 줄일 경우 마지막 라인만 사용
     return lines[-1]
 
-def parse_time_input(line: str):
+def parse_time_bytes(buf: bytearray, n: int, out: TimeInput) -> bool:
     """
-    input: "YYMMDDhhmmssRK"
+    input: b"YYMMDDhhmmssRK\n"
+    read 버퍼를 직접 파싱해서 out 에 채움 (str/dict 할당 없음).
+    여러 줄일 경우 마지막 라인만 사용
     """
-    if len(line) != 14:
-        return None
-
-    return {
-        "year":    int(line[0:2]),
-        "month":   int(line[2:4]),
-        "date":    int(line[4:6]),
-        "hours":   int(line[6:8]),
-        "minutes": int(line[8:10]),
-        "seconds": int(line[10:12]),
-        "rotary":  int(line[12]),
-        "key":     int(line[13]),
-    }
+    end = n
+    while end > 0 and buf[end - 1] in b"\r\n ":
+        end -= 1
+    start = end - 14
+    if start < 0 or (start > 0 and buf[start - 1] not in b"\r\n "):
+        return False
+    for i in range(start, end):
+        if not 48 <= buf[i] <= 57:
+            return False
+
+    out.year    = (buf[start]      - 48) * 10 + buf[start + 1]  - 48
+    out.month   = (buf[start + 2]  - 48) * 10 + buf[start + 3]  - 48
+    out.date    = (buf[start + 4]  - 48) * 10 + buf[start + 5]  - 48
+    out.hours   = (buf[start + 6]  - 48) * 10 + buf[start + 7]  - 48
+    out.minutes = (buf[start + 8]  - 48) * 10 + buf[start + 9]  - 48
+    out.seconds = (buf[start + 10] - 48) * 10 + buf[start + 11] - 48
+    out.rotary  = buf[start + 12] - 48
+    out.key     = buf[start + 13] - 48
+    return True
 
 
 # =========================
@@ -152,13 +179,49 @@ def oled_hw_reset(mode: str):
         return
     GPIO.setmode(GPIO.BCM)
     GPIO.setup(rst_pin, GPIO.OUT)
+    # SSD1306 RES# low 최소 3us. 부팅 첫 화면을 늦추지 않도록 짧게 유지
     GPIO.output(rst_pin, 0)
-    time.sleep(0.05)
+    time.sleep(0.005)
     GPIO.output(rst_pin, 1)
-    time.sleep(0.05)
+    time.sleep(0.005)
+
+class ReusedCanvas:
+    """luma canvas(device) 와 같은 사용법. Image/ImageDraw 를 매 프레임 만들지 않고 재사용"""
+    def __init__(self, device):
+        self.device = device
+        self.image = Image.new(device.mode, device.size, "black")
+        self.draw = ImageDraw.Draw(self.image)
+        self._bbox = (0, 0, device.size[0] - 1, device.size[1] - 1)
+
+    def __enter__(self):
+        self.draw.rectangle(self._bbox, outline="black", fill="black")
+        return self.draw
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.device.display(self.image)
+        return False
+
+def frame_canvas(device) -> ReusedCanvas:
+    c = getattr(device, "_frame_canvas", None)
+    if c is None:
+        c = device._frame_canvas = ReusedCanvas(device)
+    return c
+
+def show_frame(device, frame: bytes) -> bool:
+    """snapshot 의 packed 1bpp framebuffer 를 그대로 출력"""
+    w, h = device.size
+    if len(frame) != (w * h) // 8:
+        return False
+    device.display(Image.frombytes("1", (w, h), frame))
+    return True
 
 def draw_analog_clock(draw, cx: int, cy: int, r: int, t: DS1302DateTime) -> None:
     # 원 + 시/분/초 바늘
+    draw_clock_face(draw, cx, cy, r)
+    draw_clock_hands(draw, cx, cy, r, t.hours, t.minutes, t.seconds)
+
+def draw_clock_face(draw, cx: int, cy: int, r: int) -> None:
     draw.ellipse((cx - r, cy - r, cx + r, cy + r), outline="white", fill="black")
 
     # ticks (12개)
@@ -170,14 +233,19 @@ def draw_analog_clock(draw, cx: int, cy: int, r: int, t: DS1302DateTime) -> None
         y2 = cy + int(r * math.sin(ang))
         draw.line((x1, y1, x2, y2), fill="white")
 
-    sec = t.seconds % 60
-    minute = t.minutes % 60
-    hour = t.hours % 24
+def draw_clock_hands(draw, cx: int, cy: int, r: int, hours: int, minutes: int, seconds: float) -> None:
+    draw_hand_lines(draw, cx, cy, clock_hand_points(cx, cy, r, hours, minutes, seconds))
+
+def clock_hand_points(cx: int, cy: int, r: int, hours: int, minutes: int, seconds: float) -> tuple:
+    # seconds 는 sweep 모드에서 소수부 포함
+    sec = seconds % 60
+    minute = minutes % 60
+    hour = hours % 24
 
     # 각도
     sec_ang = (sec / 60.0) * 2 * math.pi - math.pi / 2
     min_ang = ((minute + sec / 60.0) / 60.0) * 2 * math.pi - math.pi / 2
-    hour_ang = (((hour % 12) + minute / 60.0) / 12.0) * 2 * math.pi - math.pi / 2
+    hour_ang = (((hour % 12) + (minute + sec / 60.0) / 60.0) / 12.0) * 2 * math.pi - math.pi / 2
 
     # 바늘 길이
     sx = cx + int((r - 2) * math.cos(sec_ang))
@@ -186,6 +254,10 @@ def draw_analog_clock(draw, cx: int, cy: int, r: int, t: DS1302DateTime) -> None
     my = cy + int((r - 4) * math.sin(min_ang))
     hx = cx + int((r - 7) * math.cos(hour_ang))
     hy = cy + int((r - 7) * math.sin(hour_ang))
+    return sx, sy, mx, my, hx, hy
+
+def draw_hand_lines(draw, cx: int, cy: int, pts: tuple) -> None:
+    sx, sy, mx, my, hx, hy = pts
 
     # hour/min thicker 느낌: 같은 라인을 2번 약간 이동해서
     draw.line((cx, cy, hx, hy), fill="white")
@@ -200,42 +272,106 @@ def draw_analog_clock(draw, cx: int, cy: int, r: int, t: DS1302DateTime) -> None
     # center dot
     draw.ellipse((cx-1, cy-1, cx+1, cy+1), outline="white", fill="white")
 
-def render_active(device, t: DS1302DateTime, clock_delta_pos: int) -> None:
+def draw_active_static(draw, device, t: DS1302DateTime, clock_delta_pos: int, no_rtc: bool) -> None:
+    # ACTIVE 화면에서 바늘을 제외한 부분
     date_str = f"{t.year:02d}/{t.month:02d}/{t.date:02d}"
     time_str = f"{t.hours:02d}:{t.minutes:02d}:{t.seconds:02d}"
-    
-    with canvas(device) as draw:
-        draw.rectangle(device.bounding_box, outline="white", fill="black")
-        # draw.text((2, 2), "ACTIVE", fill="white")
-        # draw.text((60, 2), date_str, fill="white")
-        draw.text((6, 2), date_str, fill="white")
-
-        # 아날로그 시계는 오른쪽 아래에
-        # draw_analog_clock(draw, cx=96, cy=40, r=22, t=t)
-        draw_analog_clock(draw, cx=64+clock_delta_pos, cy=38, r=22, t=t)
-
-        # 디지털은 왼쪽 아래
-        # draw.text((2, 26), time_str, fill="white")
-        draw.text((80, 2), time_str, fill="white")
-        # draw.text((2, 44), "OK:SETTING", fill="white")
+
+    draw.rectangle(device.bounding_box, outline="white", fill="black")
+    # draw.text((2, 2), "ACTIVE", fill="white")
+    # draw.text((60, 2), date_str, fill="white")
+    draw.text((6, 2), date_str, fill="white")
+
+    # 아날로그 시계는 오른쪽 아래에
+    # draw_analog_clock(draw, cx=96, cy=40, r=22, t=t)
+    draw_clock_face(draw, cx=64+clock_delta_pos, cy=38, r=22)
+
+    # 디지털은 왼쪽 아래
+    # draw.text((2, 26), time_str, fill="white")
+    draw.text((80, 2), time_str, fill="white")
+    # draw.text((2, 44), "OK:SETTING", fill="white")
+
+    # 디바이스 끊김: 마지막 시간으로 로컬 진행 중
+    if no_rtc:
+        draw.text((2, 52), "NO RTC", fill="white")
+
+def render_active(device, t: DS1302DateTime, clock_delta_pos: int, no_rtc: bool = False) -> None:
+    with frame_canvas(device) as draw:
+        draw_active_static(draw, device, t, clock_delta_pos, no_rtc)
+        draw_clock_hands(draw, 64+clock_delta_pos, 38, 22, t.hours, t.minutes, t.seconds)
+
+class ActiveSweepRenderer:
+    """
+    sweep 모드 ACTIVE 화면.
+    정적인 부분(테두리/날짜/시간/눈금)은 내용이 바뀔 때(1초에 한 번)만 배경 이미지로 그리고,
+    매 프레임은 배경을 frame 버퍼에 붙여넣고 바늘만 그린다 (두 이미지 모두 재사용).
+    바늘 좌표가 화면에 떠 있는 프레임과 같으면 SPI 전송 생략.
+    device 는 FrameCapture (다른 화면이 그려졌는지 image 로 확인)
+    """
+    def __init__(self, device: FrameCapture):
+        self.device = device
+        self._bg = Image.new(device.mode, device.size, "black")
+        self._bg_draw = ImageDraw.Draw(self._bg)
+        self._bg_key = None
+        self._frame = Image.new(device.mode, device.size, "black")
+        self._frame_draw = ImageDraw.Draw(self._frame)
+        self._last = None
+        self.skipped = 0
+
+    def render(self, t: DS1302DateTime, clock_delta_pos: int, sod: float, no_rtc: bool = False) -> bool:
+        cx = 64 + clock_delta_pos
+        isod = int(sod)
+        pts = clock_hand_points(cx, 38, 22, isod // 3600, (isod // 60) % 60, sod % 60)
+
+        key = (t.year, t.month, t.date, t.hours, t.minutes, t.seconds, clock_delta_pos, no_rtc)
+        if key != self._bg_key:
+            draw_active_static(self._bg_draw, self.device, t, clock_delta_pos, no_rtc)
+            self._bg_key = key
+            self._last = None
+        elif pts == self._last and self.device.image is self._frame:
+            self.skipped += 1
+            return False
+
+        self._frame.paste(self._bg)
+        draw_hand_lines(self._frame_draw, cx, 38, pts)
+        self._last = pts
+        self.device.display(self._frame)
+        return True
+
+def render_active_sweep(renderer: ActiveSweepRenderer, governor: "FpsGovernor", sweep_clock: "SweepClock",
+                        t: DS1302DateTime, clock_delta_pos: int, no_rtc: bool = False) -> None:
+    governor.begin()
+    renderer.render(t, clock_delta_pos, sweep_clock.seconds(), no_rtc)
+    governor.end()
         
-def star_points(cx, cy, r_outer=22, r_inner=9, points=5, rot=-math.pi/2):
-    pts = []
+def star_points(cx, cy, r_outer=22, r_inner=9, points=5, rot=-math.pi/2, out=None):
+    """out 에 [x0, y0, x1, y1, ...] 리스트를 주면 새 리스트를 만들지 않고 채워서 반환"""
+    if out is None:
+        pts = []
+        for i in range(points * 2):
+            r = r_outer if i % 2 == 0 else r_inner
+            ang = rot + (i * math.pi / points)
+            x = cx + int(round(r * math.cos(ang)))
+            y = cy + int(round(r * math.sin(ang)))
+            pts.append((x, y))
+        return pts
+
     for i in range(points * 2):
         r = r_outer if i % 2 == 0 else r_inner
         ang = rot + (i * math.pi / points)
-        x = cx + int(round(r * math.cos(ang)))
-        y = cy + int(round(r * math.sin(ang)))
-        pts.append((x, y))
-    return pts        
+        out[2 * i] = cx + int(round(r * math.cos(ang)))
+        out[2 * i + 1] = cy + int(round(r * math.sin(ang)))
+    return out
+
+_STAR_POINTS = [0] * 20
 
 def render_screensaver(device, tick):
-    with canvas(device) as draw:
+    with frame_canvas(device) as draw:
         draw.rectangle(device.bounding_box, outline="black", fill="black")
         delta_pos = ((tick + 32) % 128) - 32 if ((tick + 32) % 128) < 64 else 128 - ((tick + 32) % 128) - 32
         delta_size = (tick % 8) if (tick % 8) < 4 else 8 - (tick % 8)
         delta_rot = delta_pos / 64 * math.pi
-        pts = star_points(64 + delta_pos, 32, 22 + delta_size, rot=-math.pi / 2 + delta_rot)
+        pts = star_points(64 + delta_pos, 32, 22 + delta_size, rot=-math.pi / 2 + delta_rot, out=_STAR_POINTS)
         draw.polygon(pts, outline="white", fill="white")
         
 def get_text_size(draw, text):
@@ -260,7 +396,7 @@ def render_setting(device, t: DS1302DateTime, idx: int, mode: int) -> None:
     datetime_str = f"{t.year:02d} / {t.month:02d} / {t.date:02d}   {t.hours:02d} : {t.minutes:02d} : {t.seconds:02d}"
     button_str = "[OK]   [CANCEL]"
     
-    with canvas(device) as draw:
+    with frame_canvas(device) as draw:
         draw.rectangle(device.bounding_box, outline="white", fill="black")
         w, _ = get_text_size(draw, "[SETTING]")
         draw.text(((128 - w) // 2, 2), f"[SETTING]", fill="white")
@@ -287,37 +423,101 @@ class UIState(Enum):
     ACTIVE = auto()
     SCREENSAVER = auto()
     SETTING = auto()
+
+def save_snapshot(path: str, device, t: DS1302DateTime, clock_delta_pos: int, state: UIState) -> None:
+    ok = ds1302_snapshot.save(path, t, clock_delta_pos, state.value, device.frame_bytes())
+    if DEBUG:
+        print(f"  [snapshot] save: {'ok' if ok else 'fail'}")
+    
+def handle_sigterm(signum, frame) -> None:
+    # systemd stop / kill 도 Ctrl+C 와 같이 finally 정리(snapshot 저장) 를 거치도록
+    raise KeyboardInterrupt
+
+def main(device=None, device_name: str = DEVICE_NAME, snapshot_path: str = SNAPSHOT_PATH,
+         clock=time, poller=None) -> None:
+    """
+    인자를 주지 않으면 실제 하드웨어(ssd1306 SPI, /dev/my_custom_device_driver) 로 실행.
+    soak_memory.py 는 같은 루프를 dummy device / 가짜 드라이버 poller / 가짜 clock 으로 돌린다.
+    (clock: time(), monotonic(), sleep() 제공, poller: select.poll() 과 같은 register/unregister/poll)
+    """
+    signal.signal(signal.SIGTERM, handle_sigterm)
     
-def main() -> None:
     # OLED init
-    oled_hw_reset("spi")
-    serial_spi = spi(port=0, device=0, gpio_DC=25, gpio_RST=24)
-    device_spi = ssd1306(serial_spi, width=128, height=64, rotate=0)
+    if device is None:
+        oled_hw_reset("spi")
+        serial_spi = spi(port=0, device=0, gpio_DC=25, gpio_RST=24)
+        device = ssd1306(serial_spi, width=128, height=64, rotate=0)
+    device_spi = FrameCapture(device)
     # oled_hw_reset("i2c")
     # serial_i2c = i2c(port=1, address=0x3c)
-    # device_i2c = ssd1306(serial_i2c, width=128, height=64, rotate=0)
-    
-    # driver open
-    fd = open_with_retry(DEVICE_NAME)
-    p = select.poll()
-    p.register(fd, select.POLLIN | select.POLLERR | select.POLLHUP)
-    # ep = select.epoll()
-    # ep.register(fd, select.EPOLLIN | select.EPOLLERR | select.EPOLLHUP)
-    time.sleep(0.5)
+    # device_i2c = FrameCapture(ssd1306(serial_i2c, width=128, height=64, rotate=0))
     
     # UI states
     state = UIState.ACTIVE
-    last_input_ts = time.time()
-    
-    #
-    t = DS1302DateTime(year=25, month=12, date=29, hours=10, minutes=20, seconds=30)
-    write_time(fd, t)
+    last_input_ts = clock.time()
     
     #
+    t = DS1302DateTime()
     clock_delta_pos = 0
     
+    # instant-on: 디바이스 open 전에 마지막 화면/상태 복원
+    snap = ds1302_snapshot.load(snapshot_path)
+    if snap:
+        if show_frame(device_spi, snap["frame"]) and DEBUG:
+            print(f"  [snapshot] first frame: {(time.monotonic() - PROCESS_START_TS) * 1000:.1f} ms (from process start)")
+        for name, value in snap["time"].items():
+            setattr(t, name, value)
+        if not is_valid(t):
+            normalize(t)
+        # 꺼져 있던 시간만큼 진행 (디바이스가 열리면 RTC 값으로 덮어씀)
+        elapsed = int(clock.time() - snap["saved_at"])
+        if elapsed > 0:
+            advance_seconds(t, elapsed)
+        clock_delta_pos = clamp(snap["clock_delta_pos"], -32, 32)
+        # 편집 중이던 SETTING 은 이어가지 않음 (RTC 에는 commit 시에만 write)
+        if snap["state"] == UIState.SCREENSAVER.value:
+            state = UIState.SCREENSAVER
+    
+    # driver open (non-blocking, 끊기면 backoff 로 재연결)
+    from ds1302_device import DeviceConnection
+    p = poller if poller is not None else select.poll()
+    conn = DeviceConnection(device_name, p, clock=clock.monotonic)
+    # ep = select.epoll()
+    # ep.register(fd, select.EPOLLIN | select.EPOLLERR | select.EPOLLHUP)
+    conn.service()
+    
+    # RTC 끊김 동안 t 를 로컬로 진행시키기 위한 기준 시각
+    local_sync_ts = clock.monotonic()
+    last_snapshot_ts = clock.time()
+    last_snapshot_check_ts = last_snapshot_ts
+    last_snapshot_key = (state, clock_delta_pos)
+    
+    # sweep mode
+    sweep = sweep_clock = governor = None
+    if SWEEP_MODE:
+        from oled_sweep import SweepClock, FpsGovernor
+        sweep = ActiveSweepRenderer(device_spi)
+        sweep_clock = SweepClock(clock.monotonic)
+        sweep_clock.sync(t.hours, t.minutes, t.seconds)
+        governor = FpsGovernor(SWEEP_FPS, clock=clock.monotonic)
+    # sweep 프레임 timeout 마다 디바이스를 읽지 않도록, 다음 timeout read 시각
+    next_device_read_ts = clock.monotonic()
+    
+    # 루프에서 재사용하는 버퍼
+    read_buf = bytearray(256)
+    inp = TimeInput()
+    
+    # memory budget mode
+    sampler = None
+    if MEMORY_BUDGET_MODE:
+        from memory_budget import MemorySampler
+        # 첫 snapshot 저장(Image.tobytes) 때 한 번 일어나는 lazy import 를 frame 할당에서 제외
+        import PIL.ImageFile
+        sampler = MemorySampler(MEMORY_BUDGET_FRAME_KB, MEMORY_BUDGET_RSS_KB, MEMORY_BUDGET_ACTION,
+                                clock=clock.monotonic)
+    
     #
-    last_sec_tick = time.time()
+    last_sec_tick = clock.time()
     ss_tick = 0
     
     #
@@ -327,78 +527,134 @@ def main() -> None:
     #
     try:
         while True:
-            text = ""
-            info = None
-            now = time.time()
+            n = 0
+            now = clock.time()
             input_rot = 0
             input_key = 0
             
+            if sampler is not None:
+                sampler.sample(state.name)
+            
+            if now - last_snapshot_check_ts >= SNAPSHOT_CHECK_SEC:
+                last_snapshot_check_ts = now
+                snapshot_key = (state, clock_delta_pos)
+                if state != UIState.SETTING and (snapshot_key != last_snapshot_key
+                                                 or now - last_snapshot_ts >= SNAPSHOT_MAX_AGE_SEC):
+                    save_snapshot(snapshot_path, device_spi, t, clock_delta_pos, state)
+                    last_snapshot_ts = now
+                    last_snapshot_key = snapshot_key
+            
             #
             try:
+                conn.service()
                 if state == UIState.SCREENSAVER:
-                    events = p.poll(87)
-                    # events = p.poll(10)
+                    timeout = 87
+                    # timeout = 10
                 else:
-                    events = p.poll(870)
+                    timeout = DEVICE_POLL_MS
+                if not conn.connected:
+                    timeout = min(timeout, conn.ms_until_retry())
+                if sweep is not None and state == UIState.ACTIVE:
+                    timeout = min(timeout, governor.ms_until_next())
+                events = p.poll(timeout)
                 
                 if not events:
                     # timeout
-                    try:
+                    # sweep 모드 ACTIVE 에서는 프레임 deadline 으로 깨어난 경우 render 만 하고
+                    # 디바이스 read / stale 검사는 DEVICE_POLL_MS 주기로만 수행
+                    mono = clock.monotonic()
+                    if sweep is None or state != UIState.ACTIVE or mono >= next_device_read_ts:
+                        next_device_read_ts = mono + DEVICE_POLL_MS / 1000
+                        if conn.is_stale():
+                            conn.drop("device node removed")
                         # text = read_time_ipnut(fd)
-                        data = os.read(fd, 256)
-                        if data:
-                            text = data.decode("utf-8", "replace").strip()
-                        if text:
-                            print(f"  [TIMEOUT] {text}")
-                    except BlockingIOError:
-                        pass
+                        n = conn.read_into(read_buf)
+                        if n and DEBUG >= 2:
+                            print(f"  [TIMEOUT] {read_buf[:n].decode('utf-8', 'replace').strip()}")
                 
                 else:
                     for _fd, ev in events:
+                        if _fd != conn.fd:
+                            continue
                         if ev & select.POLLERR or ev & select.POLLHUP:
-                            print(f"  [ERROR] epoll error/hup")
+                            print(f"  [ERROR] poll error/hup")
+                            conn.drop("poll error/hup")
                             continue
                         if ev & select.POLLIN:
-                            try:
-                                # text = read_time_ipnut(_fd)
-                                data = os.read(_fd, 256)
-                                if data:
-                                    text = data.decode("utf-8", "replace").strip()
-                                if text:
-                                    print(f"  [POLL-IN] {text}")
-                                    # print(f"  [POLL-IN] {text} (data: {data}) (fd: {_fd})")
-                                    time.sleep(0.05)
-                            except BlockingIOError:
-                                pass
-            except BlockingIOError:
-                print(f"  [ERROR] BlockingIOError")
-                text = ""
+                            # text = read_time_ipnut(_fd)
+                            n = conn.read_into(read_buf)
+                            next_device_read_ts = clock.monotonic() + DEVICE_POLL_MS / 1000
+                            if n:
+                                if DEBUG >= 2:
+                                    print(f"  [POLL-IN] {read_buf[:n].decode('utf-8', 'replace').strip()}")
+                                # print(f"  [POLL-IN] {text} (fd: {_fd})")
+                                # sweep 모드에서는 프레임 시각을 놓치지 않도록 sleep 생략
+                                if sweep is None:
+                                    clock.sleep(0.05)
             except OSError as e:
-                print(f"  [ERROR] read error: {e}", file=sys.stderr)
-                text = ""
+                print(f"  [ERROR] poll error: {e}", file=sys.stderr)
+                n = 0
             
-            if not text:
+            if not n:
+                if conn.connected:
+                    if sweep is not None and state == UIState.ACTIVE and governor.due():
+                        render_active_sweep(sweep, governor, sweep_clock, t, clock_delta_pos)
+                    continue
+                
+                # degraded: RTC 없이 마지막 시간 기준으로 로컬 진행
+                elapsed = int(clock.monotonic() - local_sync_ts)
+                if elapsed > 0:
+                    local_sync_ts += elapsed
+                    if state != UIState.SETTING:
+                        if not is_valid(t):
+                            normalize(t)
+                        advance_seconds(t, elapsed)
+                        if sweep is not None:
+                            sweep_clock.sync(t.hours, t.minutes, t.seconds)
+                
+                if sweep is not None and state == UIState.ACTIVE:
+                    if governor.due():
+                        render_active_sweep(sweep, governor, sweep_clock, t, clock_delta_pos, no_rtc=True)
+                    continue
+                if elapsed <= 0 and state != UIState.SCREENSAVER:
+                    continue
+                
+                if state == UIState.ACTIVE:
+                    render_active(device_spi, t, clock_delta_pos, no_rtc=True)
+                elif state == UIState.SCREENSAVER:
+                    ss_tick += 1
+                    render_screensaver(device_spi, ss_tick)
+                elif state == UIState.SETTING:
+                    render_setting(device_spi, t, setting_cursor_idx, setting_mode)
                 continue
             
-            info = parse_time_input(text)
-            if not info:
+            if not parse_time_bytes(read_buf, n, inp):
                 continue
                 
             # detect input
             # refresh last input time
-            input_rot = info["rotary"]
-            input_key = info["key"]
+            input_rot = inp.rotary
+            input_key = inp.key
             if input_rot > 0 or input_key > 0:
                 last_input_ts = now
             
+            # 범위를 벗어난 RTC 값(통신 오류 등)은 t 에 반영하지 않음 (입력은 그대로 처리)
+            time_ok = is_valid(inp)
+            if not time_ok:
+                print(f"  [ERROR] invalid time: {inp}", file=sys.stderr)
+            
             # refresh time
-            if state != UIState.SETTING:
-                t.year = info["year"]
-                t.month = info["month"]
-                t.date = info["date"]
-                t.hours = info["hours"]
-                t.minutes = info["minutes"]
-                t.seconds = info["seconds"]
+            if state != UIState.SETTING and time_ok:
+                t.year = inp.year
+                t.month = inp.month
+                t.date = inp.date
+                t.hours = inp.hours
+                t.minutes = inp.minutes
+                t.seconds = inp.seconds
+                t.dayofweek = day_of_week(t.year, t.month, t.date)
+                if sweep is not None:
+                    sweep_clock.sync(t.hours, t.minutes, t.seconds)
+                local_sync_ts = clock.monotonic()
             
                 
             # state transition & process
@@ -432,41 +688,38 @@ def main() -> None:
                         if setting_cursor_idx < 6:
                             setting_mode = 1
                         elif setting_cursor_idx == 6:
-                            write_time(fd, t)
+                            write_time(conn.fd, t)
                             state = UIState.ACTIVE
                         elif setting_cursor_idx == 7:
-                            t.year = info["year"]
-                            t.month = info["month"]
-                            t.date = info["date"]
-                            t.hours = info["hours"]
-                            t.minutes = info["minutes"]
-                            t.seconds = info["seconds"]
+                            if time_ok:
+                                t.year = inp.year
+                                t.month = inp.month
+                                t.date = inp.date
+                                t.hours = inp.hours
+                                t.minutes = inp.minutes
+                                t.seconds = inp.seconds
+                                t.dayofweek = day_of_week(t.year, t.month, t.date)
                             state = UIState.ACTIVE
                 elif setting_mode == 1:
-                    if input_rot == 1:
-                        if setting_cursor_idx == 0:     t.year = (t.year + 1) % 100
-                        elif setting_cursor_idx == 1:
-                            t.month = clamp(t.month + 1, 1, 12)
-                            t.date = clamp(t.date, 1, days_in_month(t.year, t.month))
-                        elif setting_cursor_idx == 2:   t.date = clamp(t.date + 1, 1, days_in_month(t.year, t.month))
-                        elif setting_cursor_idx == 3:   t.hours = clamp(t.hours + 1, 0, 23)
-                        elif setting_cursor_idx == 4:   t.minutes = clamp(t.minutes + 1, 0, 59)
-                        elif setting_cursor_idx == 5:   t.seconds = clamp(t.seconds + 1, 0, 59)
-                    elif input_rot == 2:
-                        if setting_cursor_idx == 0:     t.year = (t.year - 1) % 100
-                        elif setting_cursor_idx == 1:
-                            t.month = clamp(t.month - 1, 1, 12)
-                            t.date = clamp(t.date, 1, days_in_month(t.year, t.month))
-                        elif setting_cursor_idx == 2:   t.date = clamp(t.date - 1, 1, days_in_month(t.year, t.month))
-                        elif setting_cursor_idx == 3:   t.hours = clamp(t.hours - 1, 0, 23)
-                        elif setting_cursor_idx == 4:   t.minutes = clamp(t.minutes - 1, 0, 59)
-                        elif setting_cursor_idx == 5:   t.seconds = clamp(t.seconds - 1, 0, 59)
+                    if input_rot == 1 or input_rot == 2:
+                        # year 는 순환, 나머지는 normalize() 에서 clamp (date 는 월 길이 기준)
+                        step = 1 if input_rot == 1 else -1
+                        if setting_cursor_idx == 0:     t.year += step
+                        elif setting_cursor_idx == 1:   t.month += step
+                        elif setting_cursor_idx == 2:   t.date += step
+                        elif setting_cursor_idx == 3:   t.hours += step
+                        elif setting_cursor_idx == 4:   t.minutes += step
+                        elif setting_cursor_idx == 5:   t.seconds += step
+                        normalize(t)
                     elif input_key == 1:
                         setting_mode = 0
             
             # render
             if state == UIState.ACTIVE:
-                render_active(device_spi, t, clock_delta_pos)
+                if sweep is not None:
+                    render_active_sweep(sweep, governor, sweep_clock, t, clock_delta_pos)
+                else:
+                    render_active(device_spi, t, clock_delta_pos)
                 # render_active(device_i2c, t, clock_delta_pos)
             elif state == UIState.SCREENSAVER:
                 render_screensaver(device_spi, ss_tick)
@@ -478,15 +731,14 @@ def main() -> None:
     except KeyboardInterrupt:
         pass
     finally:
-        try:
-            p.unregister(fd)
-            # p.close()
-        except Exception:
-            pass
-        try:
-            os.close(fd)
-        except Exception:
-            pass
+        if DEBUG:
+            print(f"  [conn] {conn.stats()}")
+            if sweep is not None:
+                print(f"  [fps] {governor.stats()} (skipped: {sweep.skipped})")
+        if sampler is not None:
+            print(sampler.report())
+        conn.close()
+        save_snapshot(snapshot_path, device_spi, t, clock_delta_pos, state)
         device_spi.clear()
         device_spi.cleanup()
         # device_i2c.clear()
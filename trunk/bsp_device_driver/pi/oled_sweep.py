@@ -0,0 +1,311 @@
+"""
+Sweep mode helpers
+
+- SweepClock   : 디바이스에서 받은 정수 초를 monotonic 시간으로 보간 (sub-second)
+- FpsGovernor  : 목표 fps 로 프레임 시각을 스케줄링하고,
+                 프레임 시간이 budget 을 넘으면 fps 를 자동으로 낮춘다.
+"""
+
+import math
+import time
+
+
+DEBUG = 1
+
+SECONDS_PER_DAY = 86400
+
+SWEEP_FPS_MIN = 20
+SWEEP_FPS_MAX = 60
+
+
+class SweepClock:
+    """
+    seconds-of-day 를 float 로 제공 (monotonic 으로 보간).
+
+    드라이버는 timer(870ms) 주기로만 ds_time 을 갱신하고, 앱은 poll timeout(870ms) 마다 읽으며
+    값은 정수 초로 잘려 있으므로, 읽은 값은 실제 시간보다 최대 ~1.9초 늦을 수 있다.
+    그래서 디바이스 값은 실제 시간의 하한으로 취급한다.
+    - 로컬이 하한보다 뒤처지면 앞으로 맞춤 (slew_max 이하면 slew_rate 로 서서히, 넘으면 즉시)
+    - 로컬이 하한보다 stale_sec 넘게 앞서면 (시간 변경) 즉시 되돌림
+    - window 개 값 모두보다 drift_sec 넘게 앞서 있으면 (RTC / monotonic drift) 서서히 되돌림
+    """
+    def __init__(self, clock=time.monotonic, stale_sec: float = 2.0, slew_max: float = 1.0,
+                 slew_rate: float = 0.2, drift_sec: float = 0.5, window: int = 16):
+        self.clock = clock
+        self.stale_sec = stale_sec
+        self.slew_max = slew_max
+        self.slew_rate = slew_rate
+        self.drift_sec = drift_sec
+        self.window = window
+        self._base = None
+        self._base_mono = 0.0
+        self._slew = 0.0            # _base_mono 부터 slew_rate 로 적용할 보정량
+        self._ahead_min = 0.0
+        self._ahead_n = 0
+
+    def _local(self, now: float) -> float:
+        local = self._base + (now - self._base_mono)
+        if self._slew:
+            step = self.slew_rate * (now - self._base_mono)
+            local += self._slew if abs(self._slew) <= step else math.copysign(step, self._slew)
+        return local
+
+    def sync(self, hours: int, minutes: int, seconds: int, now: float = None) -> None:
+        if now is None:
+            now = self.clock()
+        sod = hours * 3600 + minutes * 60 + seconds
+        if self._base is None:
+            self._base = sod
+            self._base_mono = now
+            return
+
+        # 지금까지 적용된 slew 를 base 에 반영하고 남은 보정량만 유지
+        local = self._local(now)
+        slew = self._slew - (local - self._base - (now - self._base_mono))
+        self._base = local
+        self._base_mono = now
+
+        # -12h ~ +12h 로 wrap 된 차이
+        diff = (sod - local + SECONDS_PER_DAY / 2) % SECONDS_PER_DAY - SECONDS_PER_DAY / 2
+        if diff > self.slew_max or diff < -self.stale_sec:
+            self._base = sod
+            self._slew = 0.0
+            self._ahead_n = 0
+            return
+
+        if diff > 0.0:
+            slew = max(slew, diff)
+        if self._ahead_n == 0 or -diff < self._ahead_min:
+            self._ahead_min = -diff
+        self._ahead_n += 1
+        if self._ahead_n >= self.window:
+            if self._ahead_min > self.drift_sec:
+                slew = min(slew, -self._ahead_min)
+            self._ahead_n = 0
+        self._slew = slew
+
+    def seconds(self, now: float = None) -> float:
+        if self._base is None:
+            return 0.0
+        if now is None:
+            now = self.clock()
+        return self._local(now) % SECONDS_PER_DAY
+
+
+class FpsGovernor:
+    """
+    due() / ms_until_next() 로 프레임 시각을 확인하고,
+    프레임마다 begin() -> (render) -> end() 를 호출한다.
+
+    - 프레임 시간 EMA 가 budget 의 90% 를 넘는 상태가 이어지면 fps 를 25% 낮춤
+    - budget 의 50% 미만으로 2초 정도 여유가 있으면 목표 fps 쪽으로 다시 올림
+    - 예정 시각을 한 프레임 이상 놓치면 놓친 만큼 dropped 로 집계
+      (window 이상 늦은 경우는 다른 화면에 있다가 돌아온 것으로 보고 집계하지 않음)
+    """
+    def __init__(self, target_fps: int = 30, min_fps: int = 5,
+                 window: float = 1.0, clock=time.monotonic):
+        self.clock = clock
+        self.target_fps = max(SWEEP_FPS_MIN, min(SWEEP_FPS_MAX, int(target_fps)))
+        self.min_fps = max(1, min(min_fps, self.target_fps))
+        self.fps = self.target_fps
+        self.window = window
+
+        self._next = clock()
+        self._begin = 0.0
+        self._ema = 0.0
+        self._over = 0
+        self._under = 0
+
+        # stats
+        self.frames = 0
+        self.dropped = 0
+        self.degrade_count = 0
+        self.achieved_fps = 0.0
+        self._win_start = self._next
+        self._win_frames = 0
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.fps
+
+    def due(self, now: float = None) -> bool:
+        if now is None:
+            now = self.clock()
+        return now >= self._next
+
+    def ms_until_next(self, now: float = None) -> int:
+        if now is None:
+            now = self.clock()
+        # 올림: 0 이면 due() 가 참 (남은 시간이 1us 미만이어도 poll(0) 반복 방지)
+        return max(0, math.ceil((self._next - now) * 1000))
+
+    def begin(self, now: float = None) -> None:
+        if now is None:
+            now = self.clock()
+        interval = self.interval
+        late = now - self._next
+        if interval <= late < self.window:
+            missed = int(late // interval)
+            self.dropped += missed
+            self._next += missed * interval
+        self._next = max(self._next + interval, now)
+        self._begin = now
+
+    def end(self, now: float = None) -> None:
+        if now is None:
+            now = self.clock()
+        frame_time = now - self._begin
+        self._ema = frame_time if self.frames == 0 else self._ema * 0.8 + frame_time * 0.2
+        self.frames += 1
+
+        budget = self.interval
+        if self._ema > budget * 0.9:
+            self._over += 1
+            self._under = 0
+            if self._over >= 5 and self.fps > self.min_fps:
+                self._set_fps(max(self.min_fps, int(self.fps * 0.75)))
+                self.degrade_count += 1
+        elif self._ema < budget * 0.5:
+            self._under += 1
+            self._over = 0
+            if self._under >= self.fps * 2 and self.fps < self.target_fps:
+                self._set_fps(min(self.target_fps, self.fps + 5))
+        else:
+            self._over = 0
+            self._under = 0
+
+        self._win_frames += 1
+        elapsed = now - self._win_start
+        if elapsed >= self.window:
+            self.achieved_fps = self._win_frames / elapsed
+            self._win_start = now
+            self._win_frames = 0
+
+    def _set_fps(self, fps: int) -> None:
+        if DEBUG:
+            print(f"  [fps] {self.fps} -> {fps} (frame: {self._ema * 1000:.1f} ms)")
+        self.fps = fps
+        self._over = 0
+        self._under = 0
+
+    def stats(self) -> dict:
+        return {
+            "target_fps": self.target_fps,
+            "fps": self.fps,
+            "achieved_fps": round(self.achieved_fps, 1),
+            "frame_ms": round(self._ema * 1000, 2),
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "degrade_count": self.degrade_count,
+        }
+
+
+# =========================
+# Self test
+# + python3 oled_sweep.py
+# =========================
+if __name__ == "__main__":
+    DEBUG = 0
+
+    class FakeClock:
+        def __init__(self):
+            self.now = 100.0
+        def __call__(self):
+            return self.now
+
+    # SweepClock: 디바이스 값 사이를 보간, 뒤처지면 slew 로 맞춤
+    clk = FakeClock()
+    sc = SweepClock(clk)
+    sc.sync(10, 20, 30)
+    clk.now += 0.5
+    assert abs(sc.seconds() - (10 * 3600 + 20 * 60 + 30.5)) < 1e-6
+    sc.sync(10, 20, 30)                 # 같은 초: 유지
+    assert abs(sc.seconds() % 60 - 30.5) < 1e-6
+    sc.sync(10, 20, 31)                 # 디바이스가 0.5초 앞섬: 0.2 s/s 로 slew
+    clk.now += 1.0
+    assert abs(sc.seconds() % 60 - 31.7) < 1e-6
+    clk.now += 2.0
+    assert abs(sc.seconds() % 60 - 34.0) < 1e-6
+    sc.sync(10, 20, 33)                 # 늦게 들어온 값 (stale): 되돌리지 않음
+    assert abs(sc.seconds() % 60 - 34.0) < 1e-6
+    sc.sync(10, 20, 0)                  # 시간 변경: 즉시 되돌림
+    assert abs(sc.seconds() % 60 - 0.0) < 1e-6
+    sc.sync(23, 59, 59)
+    clk.now += 1.25
+    assert abs(sc.seconds() - 0.25) < 1e-6   # 자정 wrap
+
+    # 드라이버 timer(870ms) 로 갱신되는 값을 poll timeout(870ms) 주기로 읽으면서 30fps 로 그림
+    # (drift: RTC 가 monotonic 보다 빠르거나 느린 경우)
+    import random
+
+    def simulate(seed: int, drift: float, sec: float = 600.0, fps: int = 30):
+        rnd = random.Random(seed)
+        clk = FakeClock()
+        start = clk.now
+        real0 = 10 * 3600 + rnd.random() * 60
+        real = lambda m: real0 + (m - start) * (1.0 + drift)
+        sc = SweepClock(clk)
+        timer_ts = start + rnd.random() * 0.87
+        read_ts = start + rnd.random() * 0.87
+        frame_ts = start
+        ds = int(real(start))
+        prev = None
+        back = jump = 0
+        err = 0.0
+        while clk.now < start + sec:
+            clk.now = min(timer_ts, read_ts, frame_ts)
+            if clk.now == timer_ts:
+                ds = int(real(clk.now))
+                timer_ts += 0.87
+            elif clk.now == read_ts:
+                sc.sync(ds // 3600, (ds // 60) % 60, ds % 60)
+                read_ts += 0.87 + rnd.uniform(0.0, 0.005)
+            else:
+                s = sc.seconds()
+                if prev is not None and clk.now - start > 10.0:
+                    back += s < prev
+                    jump += s - prev > 0.25
+                    err = max(err, abs(s - real(clk.now)))
+                prev = s
+                frame_ts += 1.0 / fps
+        return back, jump, err
+
+    for seed in range(5):
+        for drift in (0.0, 1e-3, -1e-3):
+            back, jump, err = simulate(seed, drift)
+            assert back == 0 and jump == 0 and err < 1.0, (seed, drift, back, jump, err)
+
+    # FpsGovernor: 빠른 프레임 -> 목표 fps 유지
+    clk = FakeClock()
+    g = FpsGovernor(60, clock=clk)
+    for _ in range(300):
+        clk.now += g.ms_until_next() / 1000
+        g.begin()
+        clk.now += 0.004
+        g.end()
+    assert g.fps == 60 and g.dropped == 0 and 55 < g.achieved_fps <= 61
+
+    # 느린 프레임(25ms) -> budget 안으로 들어올 때까지 낮춤 + dropped 집계
+    for _ in range(300):
+        clk.now += g.ms_until_next() / 1000
+        g.begin()
+        clk.now += 0.025
+        g.end()
+    assert g.fps * 0.025 <= 0.9 and g.degrade_count > 0 and g.dropped > 0
+    degraded = g.fps
+
+    # 다시 빨라지면 복귀
+    for _ in range(2000):
+        clk.now += g.ms_until_next() / 1000
+        g.begin()
+        clk.now += 0.002
+        g.end()
+    assert g.fps == 60 > degraded
+
+    # 다른 화면에 있다가 돌아오면 드롭으로 세지 않음
+    dropped = g.dropped
+    clk.now += 30.0
+    g.begin()
+    g.end()
+    assert g.dropped == dropped
+    print(f"  ok: {g.stats()}")
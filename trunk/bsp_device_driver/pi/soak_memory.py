@@ -0,0 +1,299 @@
+"""
+Memory soak benchmark
+
+my_custom_app.main() 의 실제 루프(snapshot 저장, DeviceConnection drop/재연결, degraded 경로,
+sweep governor, 루프 안의 MemorySampler 포함)를 그대로 돌린다. 주입하는 것은
+- luma dummy 디스플레이
+- FakeDriver : FIFO 를 디바이스 노드로 쓰는 가짜 드라이버 (select.poll 대신 주입)
+               ds_time 을 870ms timer 로 갱신하고, read 할 때마다 현재 줄을 주며, rotary/key 입력 때만 POLLIN
+- FakeClock  : poll timeout / sleep 만큼 시간을 즉시 진행 (24시간을 수 분에)
+앱 설정은 출하 기본값(DEBUG 포함) 그대로 두고 MEMORY_BUDGET_MODE 만 켠다 ("fail").
+
+시뮬레이션 1시간마다 같은 입력 시나리오를 반복하고 tracemalloc / RSS 를 기록해서 메모리가 평탄한지 확인한다.
+    00~40분 ACTIVE (7초마다 rotary), 30분에 1분간 노드 삭제 (rmmod/insmod)
+    40~55분 입력 없음 (SCREENSAVER)
+    55~60분 SETTING (커서 이동 / year 편집) 후 CANCEL
+
+    python3 soak_memory.py                      # 1초 모드, sweep 모드(SWEEP_FPS) 각각 24h
+    python3 soak_memory.py --hours 3 --sweep-fps 30
+
+종료 코드 0: 평탄, 1: 증가 감지 (또는 budget 초과)
+"""
+
+import os
+import sys
+import time
+import shutil
+import select
+import argparse
+import tempfile
+import tracemalloc
+
+from luma.core.device import dummy
+
+import my_custom_app as app
+from ds1302_calendar import advance_seconds
+from memory_budget import MemoryBudgetError, read_rss_kb
+
+
+WARMUP_HOURS = 1
+TRACED_GROWTH_LIMIT_KB = 16
+RSS_GROWTH_LIMIT_KB = 256
+
+DS1302_TIMER_SEC = 0.870        # 드라이버 DS1302_TIMER_MS
+OUTAGE = (1800, 1860)           # 매 시간 노드가 없는 구간 (초)
+START_WALL = 1766966400.0       # 2025-12-29 00:00 UTC
+
+
+def build_schedule() -> list:
+    """매 시간 반복하는 입력: [(offset 초, rotary, key), ...]"""
+    ev = {}
+    for s in range(0, 2400, 7):
+        ev[s] = (1 + (s // 7) % 2, 0)
+    ev[3295] = (1, 0)           # SCREENSAVER -> ACTIVE
+    ev[3300] = (0, 1)           # ACTIVE -> SETTING (커서: CANCEL)
+    s = 3304
+    for _ in range(11):
+        # 커서 -> year, 편집 모드, +1, -1, 편집 종료, 커서 -> CANCEL
+        for rot, key in ((1, 0), (0, 1), (1, 0), (2, 0), (0, 1), (2, 0)):
+            ev[s] = (rot, key)
+            s += 4
+    ev[3590] = (0, 1)           # CANCEL -> ACTIVE
+    return [(s, rot, key) for s, (rot, key) in sorted(ev.items())]
+
+
+def fill_line(line: bytearray, t, rotary: int, key: int) -> None:
+    """드라이버 read 형식 "YYMMDDhhmmssRK\\n" 을 line 에 직접 채움"""
+    i = 0
+    for v in (t.year, t.month, t.date, t.hours, t.minutes, t.seconds):
+        line[i] = 48 + v // 10
+        line[i + 1] = 48 + v % 10
+        i += 2
+    line[12] = 48 + rotary
+    line[13] = 48 + key
+    line[14] = 10
+
+
+class FakeClock:
+    """main() 에 time 모듈 대신 주입"""
+    def __init__(self, wall: float):
+        self.wall = wall
+        self.mono = 0.0
+
+    def time(self) -> float:
+        return self.wall + self.mono
+
+    def monotonic(self) -> float:
+        return self.mono
+
+    def sleep(self, sec: float) -> None:
+        self.mono += sec
+
+
+class FakeDriver:
+    """
+    main() 에 select.poll() 대신 주입하는 poller + 가짜 드라이버.
+    poll() 마다 FIFO 에 현재 줄 하나만 남겨두고 (앱이 읽지 않은 줄은 비움),
+    입력이 있으면 POLLIN, 없으면 timeout 만큼 clock 을 진행하고 [] 를 반환.
+    끝 시각이 되면 KeyboardInterrupt 로 main() 을 정상 종료시킨다.
+    """
+    def __init__(self, path: str, clock: FakeClock, hours: int, on_hour):
+        self.path = path
+        self.clock = clock
+        self.end = hours * 3600
+        self.on_hour = on_hour
+
+        self.rtc = app.DS1302DateTime(year=25, month=12, date=29, hours=0, minutes=0, seconds=0)
+        self._rtc_sec = 0
+        self._schedule = build_schedule()
+        self._idx = 0
+        self._hour = 0
+        self._rot = 0
+        self._key = 0
+        self._sent_input = False
+        self._line = bytearray(15)
+        self._drain = bytearray(4096)
+
+        self._app_fd = -1
+        self._fd = -1
+        self._pipe = select.poll()
+
+        # stats
+        self.reads = 0          # 앱이 가져간 줄
+        self.inputs = 0         # 앱이 가져간 입력
+        self.outages = 0
+
+        self._attach()
+
+    # --- select.poll interface ---
+    def register(self, fd: int, mask: int) -> None:
+        self._app_fd = fd
+
+    def unregister(self, fd: int) -> None:
+        if fd == self._app_fd:
+            self._app_fd = -1
+
+    def poll(self, timeout: int = -1) -> list:
+        self._consume()
+        if not (self._pending() and self._app_fd >= 0):
+            self._advance(timeout)
+        self._write_line()
+        if self._pending() and self._app_fd >= 0 and self._fd >= 0:
+            return [(self._app_fd, select.POLLIN)]
+        return []
+
+    # --- driver ---
+    def _pending(self) -> bool:
+        return self._rot != 0 or self._key != 0
+
+    def _attach(self) -> None:
+        os.mkfifo(self.path)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_NONBLOCK)
+        self._pipe.register(self._fd, select.POLLIN)
+        self._sent_input = False
+
+    def _detach(self) -> None:
+        self._pipe.unregister(self._fd)
+        os.close(self._fd)
+        os.unlink(self.path)
+        self._fd = -1
+
+    def _consume(self) -> None:
+        """앞서 쓴 줄을 앱이 읽었으면 입력 플래그 해제 (드라이버 read 와 동일), 아니면 비움"""
+        if self._fd < 0:
+            return
+        if self._pipe.poll(0):
+            os.readv(self._fd, (self._drain,))
+            return
+        self.reads += 1
+        if self._sent_input:
+            self._sent_input = False
+            self._rot = 0
+            self._key = 0
+            self.inputs += 1
+
+    def _advance(self, timeout: int) -> None:
+        now = self.clock.mono
+        deadline = now + timeout / 1000 if timeout is not None and timeout >= 0 else self.end
+        hour_base = self._hour * 3600
+        if self._idx < len(self._schedule):
+            offset, rot, key = self._schedule[self._idx]
+            if hour_base + offset <= deadline:
+                self.clock.mono = max(now, hour_base + offset)
+                self._idx += 1
+                if self._fd >= 0:
+                    self._rot, self._key = rot, key
+            else:
+                self.clock.mono = deadline
+        else:
+            self.clock.mono = min(deadline, hour_base + 3600)
+
+        now = self.clock.mono
+        if now >= hour_base + 3600:
+            self._hour += 1
+            self._idx = 0
+            self.on_hour(self._hour)
+            if now >= self.end:
+                raise KeyboardInterrupt
+
+        # rmmod / insmod
+        offset = now - self._hour * 3600
+        absent = OUTAGE[0] <= offset < OUTAGE[1]
+        if absent and self._fd >= 0:
+            self._detach()
+            self.outages += 1
+        elif not absent and self._fd < 0:
+            self._attach()
+
+        # ds_time 은 timer 주기로만 갱신
+        sec = int(int(now / DS1302_TIMER_SEC) * DS1302_TIMER_SEC)
+        if sec > self._rtc_sec:
+            advance_seconds(self.rtc, sec - self._rtc_sec)
+            self._rtc_sec = sec
+
+    def _write_line(self) -> None:
+        if self._fd < 0 or self._pipe.poll(0):
+            return
+        fill_line(self._line, self.rtc, self._rot, self._key)
+        os.write(self._fd, self._line)
+        self._sent_input = self._pending()
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            self._detach()
+
+
+def soak(hours: int, sweep_fps: int, frame_budget_kb: int, rss_budget_kb: int) -> int:
+    """my_custom_app.main() 을 hours 시간 동안 돌리고 평탄하면 0"""
+    app.SWEEP_MODE = 1 if sweep_fps else 0
+    if sweep_fps:
+        app.SWEEP_FPS = sweep_fps
+    app.MEMORY_BUDGET_MODE = 1
+    app.MEMORY_BUDGET_FRAME_KB = frame_budget_kb
+    app.MEMORY_BUDGET_RSS_KB = rss_budget_kb
+    app.MEMORY_BUDGET_ACTION = "fail"
+    print(f"  == {f'sweep {sweep_fps} fps' if sweep_fps else '1 s tick'} mode, {hours}h ==")
+
+    tmp = tempfile.mkdtemp()
+    clock = FakeClock(START_WALL)
+    hourly = []
+    t0 = time.monotonic()
+
+    def on_hour(hour: int) -> None:
+        hourly.append((tracemalloc.get_traced_memory()[0] / 1024, read_rss_kb()))
+        print(f"  [{hour:3d}h] traced {hourly[-1][0]:8.1f} KiB  rss {hourly[-1][1]:6d} KiB"
+              f"  ({time.monotonic() - t0:.0f}s)")
+
+    driver = FakeDriver(os.path.join(tmp, "my_custom_device_driver"), clock, hours, on_hour)
+    try:
+        app.main(device=dummy(width=128, height=64, mode="1"), device_name=driver.path,
+                 snapshot_path=os.path.join(tmp, "oled_snapshot.bin"), clock=clock, poller=driver)
+    except MemoryBudgetError as e:
+        print(f"  [memory] budget exceeded: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        driver.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"  driver: {driver.reads} reads, {driver.inputs} inputs, {driver.outages} outages")
+    # 디바이스를 읽지 않은 실행은 평탄해 보여도 의미 없음
+    if driver.reads < hours * 3600 / DS1302_TIMER_SEC / 2 or driver.inputs == 0:
+        print("  [error] the app did not read the fake device", file=sys.stderr)
+        return 1
+    steady = hourly[WARMUP_HOURS:]
+    if len(steady) < 2:
+        print(f"  [error] only {len(hourly)} hourly samples collected", file=sys.stderr)
+        return 1
+
+    traced_growth = max(h[0] for h in steady) - steady[0][0]
+    rss_growth = max(h[1] for h in steady) - steady[0][1]
+    flat = traced_growth <= TRACED_GROWTH_LIMIT_KB and rss_growth <= RSS_GROWTH_LIMIT_KB
+    print(f"  growth after warmup: traced {traced_growth:.1f} KiB (limit {TRACED_GROWTH_LIMIT_KB}), "
+          f"rss {rss_growth} KiB (limit {RSS_GROWTH_LIMIT_KB}) -> {'FLAT' if flat else 'GROWING'}")
+    return 0 if flat else 1
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hours", type=int, default=24)
+    ap.add_argument("--sweep-fps", type=int, default=None,
+                    help="0: 1 s tick mode only, 20~60: sweep mode only (default: both, sweep at SWEEP_FPS)")
+    ap.add_argument("--frame-budget-kb", type=int, default=app.MEMORY_BUDGET_FRAME_KB)
+    ap.add_argument("--rss-budget-kb", type=int, default=0)
+    args = ap.parse_args()
+    if args.hours < WARMUP_HOURS + 2:
+        ap.error(f"--hours must be >= {WARMUP_HOURS + 2} (warmup {WARMUP_HOURS}h + 2h to compare)")
+    if args.sweep_fps not in (None, 0) and not 20 <= args.sweep_fps <= 60:
+        ap.error("--sweep-fps must be 0 or 20 ~ 60")
+
+    modes = (0, app.SWEEP_FPS) if args.sweep_fps is None else (args.sweep_fps,)
+    ret = 0
+    for sweep_fps in modes:
+        ret |= soak(args.hours, sweep_fps, args.frame_budget_kb, args.rss_budget_kb)
+    return ret
+
+
+if __name__ == "__main__":
+    sys.exit(main())
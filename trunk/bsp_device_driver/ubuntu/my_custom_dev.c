@@ -301,7 +301,7 @@ static ssize_t my_custom_write(struct file *filp, const char __user *buf, size_t
 
 	buffer[len] = '\0';
 
-	// "yymmddhhMMss\n"
+	// "yymmddhhMMss\n" or "yymmddhhMMssW\n" (W : dayofweek, 1 : SUN ~ 7 : SAT)
 #ifdef DEBUG
 	printk(KERN_INFO "  [write] buf : %s\n", buffer);
 #endif
@@ -312,6 +312,8 @@ static ssize_t my_custom_write(struct file *filp, const char __user *buf, size_t
 	ds_time.hours	= (buffer[ 6] - '0') * 10 + (buffer[ 7] - '0');
 	ds_time.minutes	= (buffer[ 8] - '0') * 10 + (buffer[ 9] - '0');
 	ds_time.seconds	= (buffer[10] - '0') * 10 + (buffer[11] - '0');
+	if (len > 12 && buffer[12] >= '1' && buffer[12] <= '7')
+		ds_time.dayofweek = buffer[12] - '0';
 
 	ds1302_write_datetime();
 